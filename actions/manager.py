@@ -3,19 +3,42 @@ Action Manager for Meshtastic Bot
 
 Dynamically loads and manages actions from the actions directory.
 Each action should have:
-- should_run() -> bool: Check if action should execute
 - execute(interface, my_node_num): Execute the action
+- INTERVAL_SECONDS: Run interval, scheduled by the manager (timer actions;
+  0 disables the action), or
+- should_run() -> bool: Check if action should execute
 - get_info() -> dict: Return action information (optional)
+
+Actions whose execute() accepts a `packet` argument run for each received
+packet; all other actions run from the main loop timer. Packet actions may
+also declare:
+- PACKET_PORTNUMS: Portnums to receive, e.g. ('TEXT_MESSAGE_APP',) (default: all)
+- REQUIRES_RF: Only receive packets heard directly over RF (default: False)
 """
 
-import os
-import importlib.util
+import sys
+import time
+import heapq
+import inspect
+import pkgutil
+import importlib
 from pathlib import Path
 
+# Longest the main loop sleeps when no action is scheduled
+MAX_IDLE_SECONDS = 60
+
 
 class ActionManager:
     def __init__(self):
         self.actions = {}
+        self._action_meta = {}
+        self._dispatchers = {}
+        self._packet_actions = {}  # portnum ('*' for any) -> actions
+        self._rf_packet_actions = {}  # Same, for actions requiring RF packets
+        self._timer_actions = []
+        self._timer_heap = []  # (next_run_time, action_name)
+        self._intervals = {}
+        self._last_run = {}  # Wall-clock time, for reporting only
         self.load_actions()
     
     def load_actions(self):
@@ -24,47 +47,127 @@ class ActionManager:
         
         print(f"[⚙️] Loading actions from {actions_dir}")
         
-        # Find all Python files in the actions directory
-        for file_path in actions_dir.glob("*.py"):
-            if file_path.name.startswith("__"):
-                continue  # Skip __init__.py and __pycache__
+        # Find all modules in the actions directory with a single scan
+        for _, module_name, is_pkg in pkgutil.iter_modules([str(actions_dir)]):
+            if is_pkg or module_name == "manager":
+                continue  # Skip subpackages and this module
             
-            module_name = file_path.stem
             try:
-                # Import the module
-                spec = importlib.util.spec_from_file_location(module_name, file_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+                # Import through the regular import system to reuse cached bytecode
+                module = importlib.import_module(f"{__package__}.{module_name}")
+                
+                # An interval of 0 disables the action
+                interval = getattr(module, 'INTERVAL_SECONDS', None)
+                if interval is not None and interval <= 0:
+                    print(f"[⏸️] Skipped {module_name}: disabled (interval is 0)")
+                    continue
                 
                 # Check if module has required functions
-                if hasattr(module, 'should_run') and hasattr(module, 'execute'):
+                has_trigger = hasattr(module, 'should_run') or interval is not None
+                if has_trigger and hasattr(module, 'execute'):
                     self.actions[module_name] = module
+                    # Inspect execute() once here instead of on every run
+                    params = inspect.signature(module.execute).parameters
+                    self._action_meta[module_name] = {
+                        'accepts_packet': 'packet' in params,
+                        'accepts_conn': 'conn' in params,
+                    }
+                    dispatcher = self._build_dispatcher(module.execute, self._action_meta[module_name])
+                    self._dispatchers[module_name] = dispatcher
+                    
+                    # Actions taking a packet are driven by received packets,
+                    # everything else by the main loop timer
+                    if self._action_meta[module_name]['accepts_packet']:
+                        entry = (module_name, module.should_run, dispatcher)
+                        table = self._rf_packet_actions if getattr(module, 'REQUIRES_RF', False) else self._packet_actions
+                        for portnum in getattr(module, 'PACKET_PORTNUMS', ('*',)):
+                            table.setdefault(portnum, []).append(entry)
+                    elif interval is not None:
+                        # Don't run on first boot - first run is one interval away
+                        self._intervals[module_name] = interval
+                        heapq.heappush(self._timer_heap, (time.monotonic() + interval, module_name))
+                    else:
+                        self._timer_actions.append((module_name, module.should_run, dispatcher))
                     info = module.get_info() if hasattr(module, 'get_info') else {"name": module_name}
                     print(f"[✅] Loaded action: {info.get('name', module_name)}")
                 else:
-                    print(f"[⚠️] Skipped {module_name}: missing required functions (should_run, execute)")
+                    print(f"[⚠️] Skipped {module_name}: missing required functions (execute, should_run or INTERVAL_SECONDS)")
                     
             except Exception as e:
                 print(f"[❌] Failed to load action {module_name}: {e}")
     
-    def run_actions(self, interface, my_node_num, packet=None, conn=None):
-        """Check and run all actions that should execute."""
-        for action_name, action_module in self.actions.items():
+    @staticmethod
+    def _build_dispatcher(execute, meta):
+        """Build a call thunk that passes only the arguments execute() accepts."""
+        if meta['accepts_packet'] and meta['accepts_conn']:
+            return lambda iface, n, p, c: execute(iface, n, packet=p, conn=c)
+        if meta['accepts_packet']:
+            return lambda iface, n, p, c: execute(iface, n, packet=p)
+        if meta['accepts_conn']:
+            return lambda iface, n, p, c: execute(iface, n, conn=c)
+        return lambda iface, n, p, c: execute(iface, n)
+    
+    def run_actions(self, interface, my_node_num, packet=None, conn=None, candidates=None):
+        """Check and run all actions that should execute.
+        
+        With a packet only packet-driven actions are considered, without one
+        only timer-driven actions. Pass the packet's candidates when they
+        were already looked up with packet_candidates().
+        """
+        if packet is None:
+            self._run_scheduled(interface, my_node_num, conn)
+            actions = self._timer_actions
+        elif candidates is None:
+            actions = self.packet_candidates(packet)
+        else:
+            actions = candidates
+        for action_name, should_run, dispatch in actions:
             try:
-                if action_module.should_run():
-                    # Check if action accepts packet and/or conn parameters
-                    import inspect
-                    sig = inspect.signature(action_module.execute)
-                    kwargs = {}
-                    
-                    if 'packet' in sig.parameters:
-                        kwargs['packet'] = packet
-                    if 'conn' in sig.parameters:
-                        kwargs['conn'] = conn
-                    
-                    action_module.execute(interface, my_node_num, **kwargs)
+                if should_run():
+                    dispatch(interface, my_node_num, packet, conn)
+            except Exception as e:
+                print(f"[❌] Error running action {action_name}: {e}")
+    
+    def packet_candidates(self, packet):
+        """Return the packet actions interested in this packet (empty if none)."""
+        decoded = packet.get('decoded')
+        portnum = decoded.get('portnum') if decoded else None
+        
+        tables = (self._packet_actions,)
+        if packet.get('rxRssi') is not None:
+            tables += (self._rf_packet_actions,)
+        
+        candidates = []
+        for table in tables:
+            candidates += table.get(portnum, ())
+            candidates += table.get('*', ())
+        return candidates
+    
+    def _run_scheduled(self, interface, my_node_num, conn):
+        """Run the interval actions that are due and reschedule them.
+        
+        Scheduling uses the monotonic clock so wall-clock jumps (NTP) can't
+        make actions fire early or stall.
+        """
+        heap = self._timer_heap
+        now = time.monotonic()
+        while heap and heap[0][0] <= now:
+            _, action_name = heapq.heappop(heap)
+            try:
+                self._dispatchers[action_name](interface, my_node_num, None, conn)
             except Exception as e:
                 print(f"[❌] Error running action {action_name}: {e}")
+            # Reschedule even on failure to prevent spam attempts
+            self._last_run[action_name] = time.time()
+            heapq.heappush(heap, (time.monotonic() + self._intervals[action_name], action_name))
+    
+    def seconds_until_next_run(self):
+        """Return how long the main loop can sleep before a timer action is due."""
+        if self._timer_actions:
+            return 1  # Actions with their own should_run() must be polled
+        if not self._timer_heap:
+            return MAX_IDLE_SECONDS
+        return max(0, self._timer_heap[0][0] - time.monotonic())
     
     def get_actions_info(self):
         """Get information about all loaded actions."""
@@ -74,9 +177,22 @@ class ActionManager:
                 info[action_name] = action_module.get_info()
             else:
                 info[action_name] = {"name": action_name, "description": "No description available"}
+            if action_name in self._intervals:
+                info[action_name]["last_run"] = self._last_run.get(action_name, 0)
         return info
     
     def reload_actions(self):
         """Reload all actions (useful for development)."""
+        # Drop the cached modules so they are imported again from disk
+        for action_name in self.actions:
+            sys.modules.pop(f"{__package__}.{action_name}", None)
         self.actions.clear()
+        self._action_meta.clear()
+        self._dispatchers.clear()
+        self._packet_actions.clear()
+        self._rf_packet_actions.clear()
+        self._timer_actions.clear()
+        self._timer_heap.clear()
+        self._intervals.clear()
+        self._last_run.clear()
         self.load_actions()
@@ -5,7 +5,18 @@ This action responds to "ping" messages with "pong" automatically.
 It runs on every packet receive (no interval).
 """
 
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Only text messages are dispatched to this action
+PACKET_PORTNUMS = ('TEXT_MESSAGE_APP',)
+
+# Matches a bare "ping" in any case, tested against the raw payload bytes
+_PING_RE = re.compile(rb'^\s*ping\s*$', re.IGNORECASE)
+
+# Replies are sent from here so the delay doesn't block packet handling
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ping_pong")
 
 
 def should_run():
@@ -21,37 +32,38 @@ def execute(interface, my_node_num, packet=None):
         return
     
     try:
-        # Check if this is a text message
-        if packet.get('decoded', {}).get('portnum') != 'TEXT_MESSAGE_APP':
-            return
+        # Check if it's a direct message (destinationId should be our node).
+        # Most text traffic is broadcast, so this rejects it before touching the payload.
+        to_node = packet.get("to")
+        if to_node != my_node_num:
+            return  # Not a direct message to us
         
-        # Get the message text
-        message_text = packet.get('decoded', {}).get('payload', b'').decode('utf-8', errors='ignore').strip().lower()
+        # Don't respond to our own messages
+        from_node = packet.get("from")
+        if from_node == my_node_num:
+            return
         
         # Check if it's a ping message
-        if message_text == 'ping':
-            from_node = packet.get("from")
-            
-            # Don't respond to our own messages
-            if from_node == my_node_num:
-                return
-            
-            # Check if it's a direct message (destinationId should be our node)
-            to_node = packet.get("to")
-            if to_node != my_node_num:
-                return  # Not a direct message to us
-            
-            print(f"[🏓] Received ping from {from_node}, responding with pong")
-            
-            time.sleep(5)
-            
-            # Send pong response
-            interface.sendText("pong", destinationId=from_node)
-            
+        if not _PING_RE.match(packet['decoded'].get('payload', b'')):
+            return
+        
+        print(f"[🏓] Received ping from {from_node}, responding with pong")
+        
+        _executor.submit(_send_pong_response, interface, from_node)
+        
     except Exception as e:
         print(f"[❌] Error in ping-pong action: {e}")
 
 
+def _send_pong_response(interface, from_node):
+    """Send the pong reply after a short delay."""
+    try:
+        time.sleep(5)
+        interface.sendText("pong", destinationId=from_node)
+    except Exception as e:
+        print(f"[❌] Failed to send pong to {from_node}: {e}")
+
+
 def get_info():
     """Return information about this action."""
     return {
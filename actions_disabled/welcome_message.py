@@ -5,9 +5,46 @@ This action sends a welcome message to new RF nodes that haven't been seen befor
 It runs on every packet receive (no interval).
 """
 
-import time
-import sqlite3
+import json
+import base64
+import logging
 import os
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Only packets heard directly over RF are dispatched to this action
+REQUIRES_RF = True
+
+# Configuration
+WELCOME_MSG = os.getenv("WELCOME_MSG", "Welcome to Meshtastic!")
+SEEN_CACHE_SIZE = 10000  # Most recently seen node IDs kept in memory
+
+
+def _json_default(obj):
+    """Encode values json can't handle, such as the raw payload bytes."""
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode('ascii')
+    return repr(obj)
+
+
+# Shared encoder for stored packets, built once. orjson is used when
+# installed (pip install meshtastic-bot[fast]), otherwise compact stdlib json.
+if orjson is not None:
+    def _encode_packet(packet):
+        return orjson.dumps(packet, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+else:
+    _encode_packet = json.JSONEncoder(default=_json_default, separators=(',', ':'), ensure_ascii=False).encode
+
+# Action state
+_cursor = None
+_seen_cache = OrderedDict()  # node_id -> None, least recently seen first
+_cache_loaded = False
 
 
 def should_run():
@@ -23,47 +60,95 @@ def execute(interface, my_node_num, packet=None, conn=None):
         return
     
     try:
+        # Cheapest rejection first; the manager only dispatches RF packets
         from_node = packet.get("from")
         if not from_node or from_node == my_node_num:
             return  # Ignore own messages
 
-        # ✅ Must be a direct RF packet
-        if packet.get("rxRssi") is None or packet.get("rxSnr") is None:
-            return  # Skip non-RF packets
-
-        # Check if we've already seen this node
-        if has_seen_node(conn, from_node):
-            print(f"[📶] Already seen node {from_node}")
+        # Check if we've already seen this node. The insert itself is the
+        # authoritative check, so there is no window between lookup and store.
+        # This is the common case, so it is only logged at DEBUG level.
+        if has_seen_node(conn, from_node) or not store_node(conn, from_node, packet):
+            logger.debug("Already seen node %s", from_node)
             return
 
         # Welcome new RF node
-        welcome_msg = os.getenv("WELCOME_MSG", "Welcome to Meshtastic!")
-        
         print(f"[🆕] New RF node seen: {from_node}")
-        print("[📦] Raw packet:", packet)
+        logger.debug("Raw packet: %s", packet)
         
-        interface.sendText(welcome_msg, destinationId=from_node)
-        store_node(conn, from_node, packet)
+        try:
+            interface.sendText(WELCOME_MSG, destinationId=from_node)
+        except Exception:
+            # The node was stored before sending; forget it so the welcome
+            # is retried on its next packet
+            forget_node(conn, from_node)
+            raise
         
     except Exception as e:
         print(f"[❌] Error in welcome message action: {e}")
 
 
+def get_cursor(conn):
+    """Return a cursor on conn, reused across calls."""
+    global _cursor
+    if _cursor is None or _cursor.connection is not conn:
+        _cursor = conn.cursor()
+    return _cursor
+
+
 def has_seen_node(conn, node_id):
-    """Check if we've already seen this node."""
-    c = conn.cursor()
-    c.execute("SELECT 1 FROM nodes WHERE node_id = ?", (node_id,))
-    return c.fetchone() is not None
+    """Check if we've already seen this node.
+    
+    Only answers from memory. A node evicted from the cache reads as unseen here
+    and is caught by the INSERT OR IGNORE in store_node.
+    """
+    global _cache_loaded
+    if not _cache_loaded:
+        # Load the most recent nodes once; later lookups never touch the database
+        c = get_cursor(conn)
+        c.execute("SELECT node_id FROM nodes ORDER BY timestamp DESC LIMIT ?", (SEEN_CACHE_SIZE,))
+        for (seen_id,) in reversed(c.fetchall()):
+            _seen_cache[seen_id] = None
+        _cache_loaded = True
+    
+    if node_id in _seen_cache:
+        _seen_cache.move_to_end(node_id)
+        return True
+    return False
+
+
+def remember_node(node_id):
+    """Add a node to the seen cache, evicting the least recently seen one if full."""
+    _seen_cache[node_id] = None
+    _seen_cache.move_to_end(node_id)
+    if len(_seen_cache) > SEEN_CACHE_SIZE:
+        _seen_cache.popitem(last=False)
 
 
 def store_node(conn, node_id, packet):
-    """Store new node in database."""
-    c = conn.cursor()
+    """Store new node in database.
+    
+    Returns True if the node was inserted, False if it was already stored.
+    """
+    c = get_cursor(conn)
     c.execute("""
-        INSERT INTO nodes (node_id, raw_json)
+        INSERT OR IGNORE INTO nodes (node_id, raw_json)
         VALUES (?, ?)
-    """, (node_id, str(packet)))
+    """, (node_id, _encode_packet(packet)))
+    remember_node(node_id)
+    if c.rowcount == 0:
+        return False
+    
+    conn.commit()
+    return True
+
+
+def forget_node(conn, node_id):
+    """Remove a stored node from the database and the seen cache."""
+    c = get_cursor(conn)
+    c.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
     conn.commit()
+    _seen_cache.pop(node_id, None)
 
 
 def get_info():
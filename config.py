@@ -0,0 +1,17 @@
+"""
+Shared configuration for the Meshtastic bot scripts.
+
+Loads the .env file once and exposes the settings used by main.py and
+manual_clean.py. Actions read their own settings from the environment when
+they are loaded, after this module has run.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+PORT = os.getenv("PORT", "/dev/ttyUSB0")
+DB_PATH = os.getenv("DB_PATH", "seen_nodes.db")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
@@ -1,24 +1,33 @@
-import meshtastic
-import meshtastic.serial_interface
 import time
+import queue
+import random
 import sqlite3
-import os
+import logging
+import threading
 from pubsub import pub
-from dotenv import load_dotenv
+from config import PORT, DB_PATH, LOG_LEVEL
 from actions.manager import ActionManager
 
-# Load environment variables from .env file
-load_dotenv()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
-PORT = os.getenv("PORT", "/dev/ttyUSB0")
-DB_PATH = os.getenv("DB_PATH", "seen_nodes.db")
+# Connection retry delays, doubled after each failed attempt
+RECONNECT_MIN_SECONDS = 30
+RECONNECT_MAX_SECONDS = 300
 
-my_node_num = None
+# Received packets waiting for the packet worker; more are dropped
+PACKET_QUEUE_SIZE = 256
 
 # -- Initialize SQLite Database --
 def init_db():
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     c = conn.cursor()
+    # WAL avoids a rollback-journal write and fsync on every commit
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    # Keep the nodes table in SQLite's page cache and read it through mmap
+    c.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    c.execute("PRAGMA cache_size=-20000")  # ~20 MiB
     c.execute("""
         CREATE TABLE IF NOT EXISTS nodes (
             node_id INTEGER PRIMARY KEY,
@@ -29,33 +38,102 @@ def init_db():
     conn.commit()
     return conn
 
+# -- Connect to the device --
+def connect():
+    # Imported here so the transport stack only loads when connecting
+    from meshtastic.serial_interface import SerialInterface
+
+    backoff = RECONNECT_MIN_SECONDS
+    while True:
+        try:
+            return SerialInterface(devPath=PORT)
+        except Exception as e:
+            # Jitter keeps several bots from retrying in lockstep
+            delay = backoff * (0.9 + 0.2 * random.random())
+            print(f"[❌] Failed to connect to device: {e} (retrying in {delay:.0f}s)")
+            time.sleep(delay)
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
 # -- Handle incoming packets --
-def on_receive(packet=None, interface=None):
-    global my_node_num, conn, action_manager
-    try:
+class Bot:
+    """Runtime state shared with the packet callback.
+
+    Packets are queued by on_receive, which runs on meshtastic's publishing
+    thread, and handled by a worker thread. Slow actions (database writes,
+    sends) then don't delay the library's other events, and the backlog is
+    capped at PACKET_QUEUE_SIZE packets; packets beyond that are dropped.
+    """
+
+    def __init__(self, my_node_num, conn, action_manager):
+        self.my_node_num = my_node_num
+        self.conn = conn
+        self.action_manager = action_manager
+        self.packets = queue.Queue(maxsize=PACKET_QUEUE_SIZE)
+        self.dropped = 0
+        self.worker = threading.Thread(target=self._process_packets, name="packet-worker", daemon=True)
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        try:
+            self.packets.put(None, timeout=5)
+        except queue.Full:
+            pass
+        self.worker.join(timeout=5)
+
+    def on_receive(self, packet=None, interface=None):
         if not packet or not interface:
             return
 
-        # Run packet-based actions (like ping-pong and welcome messages)
-        action_manager.run_actions(interface, my_node_num, packet=packet, conn=conn)
+        # Drop packets no action is interested in (wrong portnum, not RF)
+        # before they are queued; the worker reuses the looked-up actions
+        candidates = self.action_manager.packet_candidates(packet)
+        if not candidates:
+            return
 
-    except Exception as e:
-        print(f"[‼] Error: {e}")
+        try:
+            self.packets.put_nowait((packet, interface, candidates))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                print(f"[⚠️] Packet queue full, dropped {self.dropped} packets so far")
 
-def main():
-    global my_node_num, conn, action_manager
+    def _process_packets(self):
+        while True:
+            item = self.packets.get()
+            if item is None:
+                return
 
+            packet, interface, candidates = item
+            try:
+                # Run packet-based actions (like ping-pong and welcome messages)
+                self.action_manager.run_actions(interface, self.my_node_num, packet=packet,
+                                                conn=self.conn, candidates=candidates)
+            except Exception as e:
+                print(f"[‼] Error: {e}")
+
+def main():
     print("[🔌] Connecting to Meshtastic device...")
-    iface = meshtastic.serial_interface.SerialInterface(devPath=PORT)
+    try:
+        iface = connect()
+    except KeyboardInterrupt:
+        # Interrupted while waiting to retry; nothing is open yet
+        print("\n[⛔] Exiting...")
+        return
 
     my_node_num = iface.myInfo.my_node_num
     print(f"[🆔] This node ID: {my_node_num}")
 
     conn = init_db()
-    pub.subscribe(on_receive, "meshtastic.receive")
 
     # Initialize action manager
     action_manager = ActionManager()
+
+    # pubsub keeps only a weak reference to the bound method; `bot` lives as long as main()
+    bot = Bot(my_node_num, conn, action_manager)
+    bot.start()
+    pub.subscribe(bot.on_receive, "meshtastic.receive")
     
     print("[�] Waiting for new RF nodes...")
     print("[⚙️] Actions loaded and ready...")
@@ -71,9 +149,11 @@ def main():
             # Run time-based actions that should execute
             action_manager.run_actions(iface, my_node_num, conn=conn)
             
-            time.sleep(1)
+            # Sleep until the next action is due instead of polling every second
+            time.sleep(action_manager.seconds_until_next_run())
     except KeyboardInterrupt:
         print("\n[⛔] Exiting...")
+        bot.stop()  # Finish queued packets while the interface is still open
         iface.close()
         conn.close()
 
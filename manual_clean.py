@@ -11,15 +11,21 @@ of age or MQTT status.
 Usage: python manual_clean.py
 """
 
-import meshtastic
-import meshtastic.serial_interface
-import os
-from dotenv import load_dotenv
+from config import PORT
 
-# Load environment variables
-load_dotenv()
+PREVIEW_LIMIT = 10  # Nodes listed per category before confirming
+PROGRESS_EVERY = 50  # Print removal progress every this many nodes
 
-PORT = os.getenv("PORT", "/dev/ttyUSB0")
+def print_preview(label, node_ids, nodes):
+    """Print the first few nodes of a category and how many were left out."""
+    lines = []
+    for node_id in node_ids[:PREVIEW_LIMIT]:
+        node_name = nodes[node_id].get('user', {}).get('longName', 'Unknown')
+        lines.append(f"  - {label}: {node_id} ({node_name})")
+    if len(node_ids) > PREVIEW_LIMIT:
+        lines.append(f"  ... and {len(node_ids) - PREVIEW_LIMIT} more")
+    if lines:
+        print("\n".join(lines))
 
 def manual_clean_nodedb():
     """Manually clean the node database, keeping only favorite nodes and own node."""
@@ -37,7 +43,9 @@ def manual_clean_nodedb():
     
     print("\n[🔌] Connecting to Meshtastic device...")
     try:
-        iface = meshtastic.serial_interface.SerialInterface(devPath=PORT)
+        # Imported here so a cancelled run never loads the transport stack
+        from meshtastic.serial_interface import SerialInterface
+        iface = SerialInterface(devPath=PORT)
     except Exception as e:
         print(f"[❌] Failed to connect to device: {e}")
         return
@@ -49,23 +57,24 @@ def manual_clean_nodedb():
     nodes = iface.nodes
     print(f"[📊] Total nodes in database: {len(nodes)}")
     
-    favorites_count = 0
+    favorites = []
     nodes_to_remove = []
     
     # Identify nodes to keep (favorites + own) and nodes to remove
     for node_id, node_data in nodes.items():
-        is_favorite = node_data.get('isFavorite', False)
-        is_own_node = node_data.get('num') == my_node_num
-        node_name = node_data.get('user', {}).get('longName', 'Unknown')
-        
-        if is_own_node:
+        if node_data.get('num') == my_node_num:
+            node_name = node_data.get('user', {}).get('longName', 'Unknown')
             print(f"[🏠] Own node (always kept): {node_id} ({node_name})")
-        elif is_favorite:
-            favorites_count += 1
-            print(f"[⭐] Keeping favorite: {node_id} ({node_name})")
+        elif node_data.get('isFavorite', False):
+            favorites.append(node_id)
         else:
             nodes_to_remove.append(node_id)
-            print(f"[🗑️] Will remove: {node_id} ({node_name})")
+    favorites_count = len(favorites)
+    
+    # Show a short preview instead of one line per node
+    print(f"[⭐] Keeping {favorites_count} favorites, removing {len(nodes_to_remove)}")
+    print_preview("Keeping favorite", favorites, nodes)
+    print_preview("Will remove", nodes_to_remove, nodes)
     
     print(f"\n[📈] Summary:")
     print(f"  - Favorite nodes to keep: {favorites_count}")
@@ -77,8 +86,14 @@ def manual_clean_nodedb():
         iface.close()
         return
     
+    # With no favorites to keep, one node DB reset replaces every removal.
+    # The device always keeps its own node on reset, then reboots.
+    use_reset = favorites_count == 0
+    
     # Final confirmation for destructive action
     print(f"\n⚠️  FINAL WARNING: About to remove {len(nodes_to_remove)} nodes!")
+    if use_reset:
+        print("⚠️  No favorites to keep: the node database will be reset and the device will REBOOT.")
     response = input("❓ Type 'DELETE' to confirm (case sensitive): ").strip()
     if response != 'DELETE':
         print("⛔ Operation cancelled.")
@@ -87,28 +102,44 @@ def manual_clean_nodedb():
     
     print(f"\n[🔄] Starting manual cleanup of {len(nodes_to_remove)} nodes...")
     
-    # Remove nodes
     removed_count = 0
+    reset_count = 0
     failed_count = 0
+    local_node = iface.localNode
     
-    for node_id in nodes_to_remove:
+    if use_reset:
         try:
-            # Use the proper removeNode method from the interface
-            node_num = nodes[node_id].get('num')
-            if node_num:
-                iface.localNode.removeNode(node_num)
-                removed_count += 1
-                print(f"[🗑️] Removed node: {node_id}")
-            else:
-                print(f"[⚠️] Could not find numeric ID for {node_id}")
-                failed_count += 1
-            
+            local_node.resetNodeDb()
+            reset_count = len(nodes_to_remove)
+            nodes_to_remove = []
+            print(f"[🗑️] Reset node database ({reset_count} nodes), device is rebooting")
         except Exception as e:
-            print(f"[⚠️] Failed to remove {node_id}: {e}")
-            failed_count += 1
+            print(f"[⚠️] Node database reset failed, removing nodes one by one: {e}")
+    
+    if nodes_to_remove:
+        remove_node = local_node.removeNode
+        for node_id in nodes_to_remove:
+            try:
+                # Use the proper removeNode method from the interface
+                node_num = nodes[node_id].get('num')
+                if node_num:
+                    remove_node(node_num)
+                    removed_count += 1
+                    if removed_count % PROGRESS_EVERY == 0:
+                        print(f"[🗑️] Removed {removed_count}/{len(nodes_to_remove)} nodes...")
+                else:
+                    print(f"[⚠️] Could not find numeric ID for {node_id}")
+                    failed_count += 1
+            
+            except Exception as e:
+                print(f"[⚠️] Failed to remove {node_id}: {e}")
+                failed_count += 1
     
     print(f"\n[✅] Manual cleanup complete!")
-    print(f"  - Successfully removed: {removed_count} nodes")
+    if reset_count:
+        print(f"  - Cleared by node database reset: {reset_count} nodes")
+    else:
+        print(f"  - Successfully removed: {removed_count} nodes")
     print(f"  - Failed to remove: {failed_count} nodes")
     print(f"  - Nodes remaining: {favorites_count + 1} (favorites + own node)")
     print("[💡] Note: Changes may take a moment to reflect in the device.")